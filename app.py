@@ -1,9 +1,84 @@
+import collections
 import os
 import sys
-import datetime
+import queue
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Optional
+from typing import Dict, List, Optional
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+LOG_PATH = os.path.join(LOG_DIR, "keystrokes.txt")
+
+# Keystrokes are coalesced in memory and written out on a short timer, at
+# session boundaries and on close. There is no per-key flush or fsync, so a
+# crash can lose up to the last FLUSH_INTERVAL_MS of typing.
+FLUSH_INTERVAL_MS = 200
+FLUSH_THRESHOLD_BYTES = 4096
+# Global-mode keys are handed from the pynput thread through a queue.
+KEY_DRAIN_MS = 50
+LOG_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+# Status messages are queued and drained into the Text widget in one update.
+STATUS_DRAIN_MS = 100
+STATUS_MAX_LINES = 50
+
+# Tk keysyms (as reported, case-sensitive) for keys without a printable char.
+_TK_KEYSYM_MAP = {
+	"space": " ",
+	"Return": "\n",
+	"BackSpace": "[BACKSPACE]",
+	"Tab": "\t",
+	"Escape": "[ESC]",
+	"Shift_L": "[SHIFT]",
+	"Shift_R": "[SHIFT]",
+	"Control_L": "[CTRL]",
+	"Control_R": "[CTRL]",
+	"Alt_L": "[ALT]",
+	"Alt_R": "[ALT]",
+	"Caps_Lock": "[CAPSLOCK]",
+	"Left": "[ARROW_LEFT]",
+	"Right": "[ARROW_RIGHT]",
+	"Up": "[ARROW_UP]",
+	"Down": "[ARROW_DOWN]",
+	"Delete": "[DEL]",
+	"Insert": "[INS]",
+	"Home": "[HOME]",
+	"End": "[END]",
+	"Prior": "[PAGE_UP]",
+	"Next": "[PAGE_DOWN]",
+}
+
+# Pre-encoded single-byte keys; most keystrokes are plain ASCII.
+_ASCII_BYTES = tuple(bytes([i]) for i in range(128))
+
+# pynput Key attribute names and their log representation.
+_PYNPUT_KEY_NAMES = (
+	("space", " "),
+	("enter", "\n"),
+	("tab", "\t"),
+	("backspace", "[BACKSPACE]"),
+	("esc", "[ESC]"),
+	("shift", "[SHIFT]"),
+	("ctrl", "[CTRL]"),
+	("alt", "[ALT]"),
+	("caps_lock", "[CAPSLOCK]"),
+	("left", "[ARROW_LEFT]"),
+	("right", "[ARROW_RIGHT]"),
+	("up", "[ARROW_UP]"),
+	("down", "[ARROW_DOWN]"),
+	("delete", "[DEL]"),
+	("insert", "[INS]"),
+	("home", "[HOME]"),
+	("end", "[END]"),
+	("page_up", "[PAGE_UP]"),
+	("page_down", "[PAGE_DOWN]"),
+)
+
+
+def _encode_key(text: str) -> bytes:
+	if len(text) == 1 and text < "\x80":
+		return _ASCII_BYTES[ord(text)]
+	return text.encode("utf-8")
 
 
 class KeyInputLoggerApp:
@@ -16,16 +91,27 @@ class KeyInputLoggerApp:
 		self.root.minsize(640, 380)
 
 		self.logging_enabled: bool = False
-		self.log_directory: str = os.path.join(os.path.dirname(__file__), "logs")
-		self.log_file_path: str = os.path.join(self.log_directory, "keystrokes.txt")
-		os.makedirs(self.log_directory, exist_ok=True)
+		self.log_directory: str = LOG_DIR
+		self.log_file_path: str = LOG_PATH
+		if not os.path.isdir(self.log_directory):
+			os.makedirs(self.log_directory, exist_ok=True)
 
 		self.user_has_consented = tk.BooleanVar(value=False)
 		self.global_mode = tk.BooleanVar(value=False)
 		self._global_listener: Optional[object] = None  # pynput.keyboard.Listener when active
+		self._pynput_map: Dict[str, str] = {}  # str(Key.x) -> log text, built when the listener starts
+		self._log_fd: Optional[int] = None  # kept open for the whole logging session
+		self._log_buf = bytearray()  # encoded keystrokes waiting for the next flush
+		self._flush_job: Optional[str] = None
+		self._key_queue: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()  # filled by the pynput thread
+		self._key_job: Optional[str] = None
+		self._status_queue: "queue.Queue[str]" = queue.Queue()
+		self._status_job: Optional[str] = None
+		self._status_lines: "collections.deque[str]" = collections.deque(maxlen=STATUS_MAX_LINES)
 
 		self._build_ui()
 		self._configure_events()
+		self._status_job = self.root.after(STATUS_DRAIN_MS, self._drain_status)
 
 	def _build_ui(self) -> None:
 		container = ttk.Frame(self.root, padding=16)
@@ -85,6 +171,8 @@ class KeyInputLoggerApp:
 
 	def _configure_events(self) -> None:
 		self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+		# Bound once; _on_key_press ignores events unless an in-app session is active
+		self.root.bind("<KeyPress>", self._on_key_press)
 
 	def _on_consent_changed(self) -> None:
 		self.start_button.config(state=(tk.NORMAL if self.user_has_consented.get() else tk.DISABLED))
@@ -96,30 +184,34 @@ class KeyInputLoggerApp:
 		if self.logging_enabled:
 			return
 
+		if not self._open_log_file():
+			return
+
 		self.logging_enabled = True
 		if self.global_mode.get():
 			if not self._start_global_listener():
 				self.logging_enabled = False
+				self._close_log_file()
 				return
-		else:
-			self.root.bind("<KeyPress>", self._on_key_press, add=True)
 		self.start_button.config(state=tk.DISABLED)
 		self.stop_button.config(state=tk.NORMAL)
 
 		self._append_status("Logging started. Focus this window and type. Use 'Stop logging' to end.")
-		self._append_file_line(f"\n--- Session started {self._timestamp()} ---\n")
+		self._queue_bytes(f"\n--- Session started {self._timestamp()} ---\n".encode("utf-8"))
+		self._flush_pending()  # make the session visible in the file right away
 
 	def stop_logging(self) -> None:
 		if not self.logging_enabled:
 			return
 		self.logging_enabled = False
-		self.root.unbind("<KeyPress>")
 		self._stop_global_listener()
 		self.start_button.config(state=(tk.NORMAL if self.user_has_consented.get() else tk.DISABLED))
 		self.stop_button.config(state=tk.DISABLED)
 
 		self._append_status("Logging stopped.")
-		self._append_file_line(f"\n--- Session ended {self._timestamp()} ---\n")
+		# Rides on the final flush done by _close_log_file
+		self._queue_bytes(f"\n--- Session ended {self._timestamp()} ---\n".encode("utf-8"))
+		self._close_log_file()
 
 	def open_log_folder(self) -> None:
 		try:
@@ -133,59 +225,41 @@ class KeyInputLoggerApp:
 			messagebox.showerror("Open folder failed", str(exc))
 
 	def clear_log_file(self) -> None:
+		reopen = self._log_fd is not None
+		self._close_log_file()
 		try:
 			with open(self.log_file_path, "w", encoding="utf-8") as f:
 				f.write("")
 			self._append_status("Log file cleared.")
 		except Exception as exc:  # noqa: BLE001
 			messagebox.showerror("Clear failed", str(exc))
+		finally:
+			if reopen:
+				self._open_log_file()
 
 	def _on_key_press(self, event: tk.Event) -> None:  # type: ignore[type-arg]
-		if not self.logging_enabled:
+		# In global mode the pynput listener already sees keys typed in this window
+		if not self.logging_enabled or self._global_listener is not None:
 			return
 
 		key_repr = self._format_key_event(event)
-		try:
-			with open(self.log_file_path, "a", encoding="utf-8") as f:
-				f.write(key_repr)
-		except Exception as exc:  # noqa: BLE001
-			self._append_status(f"Failed to write key: {exc}")
-
-	def _format_key_event(self, event: tk.Event) -> str:  # type: ignore[type-arg]
-		# Printable characters
-		if getattr(event, "char", "") and event.char.isprintable():
-			return event.char
-
-		keysym = getattr(event, "keysym", "").lower()
-		mapping = {
-			"space": " ",
-			"return": "\n",
-			"backspace": "[BACKSPACE]",
-			"tab": "\t",
-			"escape": "[ESC]",
-			"shift_l": "[SHIFT]",
-			"shift_r": "[SHIFT]",
-			"control_l": "[CTRL]",
-			"control_r": "[CTRL]",
-			"alt_l": "[ALT]",
-			"alt_r": "[ALT]",
-			"caps_lock": "[CAPSLOCK]",
-			"left": "[ARROW_LEFT]",
-			"right": "[ARROW_RIGHT]",
-			"up": "[ARROW_UP]",
-			"down": "[ARROW_DOWN]",
-			"delete": "[DEL]",
-			"insert": "[INS]",
-			"home": "[HOME]",
-			"end": "[END]",
-			"prior": "[PAGE_UP]",
-			"next": "[PAGE_DOWN]",
-		}
-		if keysym in mapping:
-			return mapping[keysym]
-		if keysym:
-			return f"[{keysym.upper()}]"
-		return ""
+		if not key_repr:
+			return
+		self._queue_bytes(_encode_key(key_repr))
+
+	def _format_key_event(
+		self, event: tk.Event, _keysym_map: Dict[str, str] = _TK_KEYSYM_MAP  # type: ignore[type-arg]
+	) -> str:
+		# Tk always sets char and keysym on key events
+		char = event.char
+		if char and char.isprintable():
+			return char
+
+		keysym = event.keysym
+		text = _keysym_map.get(keysym)
+		if text is not None:
+			return text
+		return f"[{keysym.upper()}]" if keysym else ""
 
 	def _start_global_listener(self) -> bool:
 		"""Start a system-wide keyboard listener using pynput.
@@ -205,24 +279,23 @@ class KeyInputLoggerApp:
 			)
 			return False
 
+		Key = pynput_keyboard.Key
+		self._pynput_map = {str(getattr(Key, attr, attr)): text for attr, text in _PYNPUT_KEY_NAMES}
+
 		def on_press(key: object) -> None:
+			# Runs on the listener thread: no file or widget access here
 			if not self.logging_enabled:
 				return
 			text = self._format_pynput_key(key)
-			if not text:
-				return
-			try:
-				with open(self.log_file_path, "a", encoding="utf-8") as f:
-					f.write(text)
-			except Exception as exc:  # noqa: BLE001
-				# Schedule a UI update safely from listener thread
-				self.root.after(0, lambda: self._append_status(f"Failed to write key: {exc}"))
+			if text:
+				self._key_queue.put(_encode_key(text))
 
 		listener = pynput_keyboard.Listener(on_press=on_press)
 		listener.daemon = True
 		try:
 			listener.start()
 			self._global_listener = listener
+			self._key_job = self.root.after(KEY_DRAIN_MS, self._drain_keys)
 			self._append_status("Global logging enabled. Keys from other apps will be recorded.")
 			return True
 		except Exception as exc:  # noqa: BLE001
@@ -239,71 +312,115 @@ class KeyInputLoggerApp:
 			pass
 		finally:
 			self._global_listener = None
+		if self._key_job is not None:
+			self.root.after_cancel(self._key_job)
+			self._key_job = None
+		# Pick up anything typed before the listener stopped
+		self._drain_keys()
+
+	def _drain_keys(self) -> None:
+		chunks: List[bytes] = []
+		while True:
+			try:
+				chunks.append(self._key_queue.get_nowait())
+			except queue.Empty:
+				break
+		if chunks:
+			self._queue_bytes(b"".join(chunks))
+		if self._global_listener is not None:
+			self._key_job = self.root.after(KEY_DRAIN_MS, self._drain_keys)
 
 	def _format_pynput_key(self, key: object) -> str:
-		# Local import for typing without hard dependency when not used
-		try:
-			from pynput.keyboard import Key  # type: ignore
-		except Exception:  # noqa: BLE001
-			Key = object  # type: ignore
-
-		# Alphanumeric
-		try:
-			# For character keys, key.char exists
-			char = getattr(key, "char", None)
-			if isinstance(char, str) and char.isprintable():
-				return char
-		except Exception:
-			pass
+		# Alphanumeric: character keys carry key.char
+		char = getattr(key, "char", None)
+		if char and char.isprintable():
+			return char
 
 		name = str(key)
-		# Map common special keys
-		mapping = {
-			str(getattr(Key, "space", "space")): " ",
-			str(getattr(Key, "enter", "enter")): "\n",
-			str(getattr(Key, "tab", "tab")): "\t",
-			str(getattr(Key, "backspace", "backspace")): "[BACKSPACE]",
-			str(getattr(Key, "esc", "esc")): "[ESC]",
-			str(getattr(Key, "shift", "shift")): "[SHIFT]",
-			str(getattr(Key, "ctrl", "ctrl")): "[CTRL]",
-			str(getattr(Key, "alt", "alt")): "[ALT]",
-			str(getattr(Key, "caps_lock", "caps_lock")): "[CAPSLOCK]",
-			str(getattr(Key, "left", "left")): "[ARROW_LEFT]",
-			str(getattr(Key, "right", "right")): "[ARROW_RIGHT]",
-			str(getattr(Key, "up", "up")): "[ARROW_UP]",
-			str(getattr(Key, "down", "down")): "[ARROW_DOWN]",
-			str(getattr(Key, "delete", "delete")): "[DEL]",
-			str(getattr(Key, "insert", "insert")): "[INS]",
-			str(getattr(Key, "home", "home")): "[HOME]",
-			str(getattr(Key, "end", "end")): "[END]",
-			str(getattr(Key, "page_up", "page_up")): "[PAGE_UP]",
-			str(getattr(Key, "page_down", "page_down")): "[PAGE_DOWN]",
-		}
-		if name in mapping:
-			return mapping[name]
-		# Fallback: normalize like [KEY]
-		clean = name.replace("Key.", "").upper()
-		return f"[{clean}]"
+		# Map common special keys, else normalize like [KEY]
+		return self._pynput_map.get(name) or f"[{name.replace('Key.', '').upper()}]"
 
 	def _timestamp(self) -> str:
-		return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+		return time.strftime("%Y-%m-%d %H:%M:%S")
 
 	def _append_status(self, message: str) -> None:
-		self.status_text.config(state=tk.NORMAL)
-		self.status_text.insert(tk.END, f"{message}\n")
-		self.status_text.see(tk.END)
-		self.status_text.config(state=tk.DISABLED)
+		# Safe from any thread; the widget is only touched in _drain_status
+		self._status_queue.put(message)
 
-	def _append_file_line(self, text: str) -> None:
+	def _drain_status(self) -> None:
+		messages: List[str] = []
+		while True:
+			try:
+				messages.append(self._status_queue.get_nowait())
+			except queue.Empty:
+				break
+		if messages:
+			# Only the most recent lines are kept; redraw them in one transaction
+			self._status_lines.extend(messages)
+			self.status_text.config(state=tk.NORMAL)
+			self.status_text.delete("1.0", tk.END)
+			self.status_text.insert(tk.END, "\n".join(self._status_lines) + "\n")
+			self.status_text.see(tk.END)
+			self.status_text.config(state=tk.DISABLED)
+		self._status_job = self.root.after(STATUS_DRAIN_MS, self._drain_status)
+
+	def _queue_bytes(self, data: bytes) -> None:
+		"""Buffer data for the next flush; Tk thread only."""
+		self._log_buf += data
+		if len(self._log_buf) >= FLUSH_THRESHOLD_BYTES:
+			self._flush_pending()
+		elif self._flush_job is None:
+			self._flush_job = self.root.after(FLUSH_INTERVAL_MS, self._flush_pending)
+
+	def _flush_pending(self) -> None:
+		if self._flush_job is not None:
+			self.root.after_cancel(self._flush_job)
+			self._flush_job = None
+		if not self._log_buf:
+			return
+		data, self._log_buf = self._log_buf, bytearray()
 		try:
-			with open(self.log_file_path, "a", encoding="utf-8") as f:
-				f.write(text)
+			self._write_log(data)
 		except Exception as exc:  # noqa: BLE001
 			self._append_status(f"Failed writing to file: {exc}")
 
+	def _open_log_file(self) -> bool:
+		"""Open the persistent log handle used for the whole session."""
+		if self._log_fd is not None:
+			return True
+		try:
+			self._log_fd = os.open(self.log_file_path, LOG_OPEN_FLAGS, 0o644)
+			return True
+		except Exception as exc:  # noqa: BLE001
+			messagebox.showerror("Open log failed", str(exc))
+			return False
+
+	def _close_log_file(self) -> None:
+		self._flush_pending()
+		fd = self._log_fd
+		if fd is None:
+			return
+		self._log_fd = None
+		try:
+			os.close(fd)
+		except Exception as exc:  # noqa: BLE001
+			self._append_status(f"Failed closing log file: {exc}")
+
+	def _write_log(self, data: bytearray) -> None:
+		fd = self._log_fd
+		if fd is None:
+			raise RuntimeError("log file is not open")
+		view = memoryview(data)
+		while view:
+			view = view[os.write(fd, view):]
+
 	def _on_close(self) -> None:
 		if self.logging_enabled:
 			self.stop_logging()
+		self._close_log_file()
+		if self._status_job is not None:
+			self.root.after_cancel(self._status_job)
+			self._status_job = None
 		self.root.destroy()
 
 